@@ -1,10 +1,21 @@
 # -*- coding: utf-8 -*-
 
 
+import numpy as np
+from .utils import COMPACT_DTYPES, TypedColumn, check_precision
+
+
 class Broker:
-    def __init__(self, commission, slippage):
+    # 回测过程中更新的结果列表，断点只保存这些状态
+    _state_attrs = ("ret", "order_position", "total_position", "open_date", "close_date",
+                    "open_price", "close_price", "market_value")
+
+    def __init__(self, commission, slippage, precision="float64"):
+        check_precision(precision)
         self.commission = commission
         self.slippage = slippage
+        self.precision = precision
+        self.is_compact = False       # 结果是否已转换为紧凑数组
         self.ret = []                 # 按bar更新
         self.order_position = []      # 按信号更新
         self.total_position = []      # 按bar更新
@@ -14,19 +25,59 @@ class Broker:
         self.close_price = []
         self.market_value = []  # 按bar更新
 
+    @property
+    def config(self):
+        """返回broker的配置参数"""
+        return {"commission": self.commission, "slippage": self.slippage, "precision": self.precision}
+
+    def allocate(self, size):
+        """
+        float32精度模式下为逐bar更新的ret、total_position、market_value预分配长度为size的定长数组，
+        回测过程中直接写入数组，而不是在列表中保存Python对象
+        """
+        if self.precision != "float32" or self.is_compact:
+            return
+        self.ret = TypedColumn(size, COMPACT_DTYPES["price"])
+        self.total_position = TypedColumn(size, COMPACT_DTYPES["position"])
+        self.market_value = TypedColumn(size, COMPACT_DTYPES["price"])
+
+    def get_state(self):
+        """返回各结果列表，用于断点保存"""
+        state = {}
+        for name in self._state_attrs:
+            column = getattr(self, name)
+            state[name] = np.array(column) if isinstance(column, TypedColumn) else list(column)
+        return state
+
+    def set_state(self, state):
+        """从断点中恢复各结果列表，预分配的数组在原位写入"""
+        for name in self._state_attrs:
+            column = getattr(self, name)
+            if isinstance(column, TypedColumn):
+                column.clear()
+                column.extend(state[name])
+            else:
+                setattr(self, name, list(state[name]))
+
+    def _cum_ret(self):
+        """返回按bar顺序依次累加的累计收益，预分配数组以float64累加"""
+        if isinstance(self.ret, TypedColumn):
+            return float(np.cumsum(self.ret, dtype=np.float64)[-1]) if len(self.ret) > 0 else 0.
+        return sum(self.ret)
+
     def order_open(self, exercise_price):
         """开仓买入或者卖出"""
 
         if len(self.total_position) == 0:  # 判断回测起始日
             self.order_position.append(self.ctx.bar.signal)
             self.total_position.append(self.ctx.bar.signal)
-            self.ret.append((self.ctx.bar.close - exercise_price)*self.ctx.bar.signal - self.commision - self.slippage)
+            self.ret.append((self.ctx.bar.close - exercise_price)*self.ctx.bar.signal - self.commission - self.slippage)
             self.market_value.append(self.ctx.bar.close * abs(self.ctx.bar.signal))
             self.open_date.append(self.ctx.time)
             self.open_price.append(exercise_price)
         else:      # 非回测起始日
             if self.total_position[-1] == 0:  # 上个交易日没有持仓头寸
-                order_num = max(1, int(sum(self.ret) / exercise_price)) * self.ctx.bar.signal
+                order_num = max(1, int(self._cum_ret() / exercise_price)) * self.ctx.bar.signal
                 self.ret.append(order_num * (self.ctx.bar.close - exercise_price - self.commission - self.slippage))
                 self.total_position.append(order_num)
                 self.order_position.append(order_num)
@@ -34,7 +85,7 @@ class Broker:
                 self.open_price.append(exercise_price)
                 self.market_value.append(abs(order_num) * self.ctx.bar.close)
             else:   # 上个交易日有持仓头寸
-                order_num = int(sum(self.ret) / exercise_price) - abs(self.total_position[-1])
+                order_num = int(self._cum_ret() / exercise_price) - abs(self.total_position[-1])
                 if order_num > 0:  # 增仓
                     self.ret.append(order_num * (self.ctx.bar.signal * (self.ctx.bar.close - exercise_price) -
                                                  self.commission - self.slippage) + \
@@ -56,7 +107,7 @@ class Broker:
         if len(self.total_position) == 0:  # 回测起始日
             self.total_position.append(self.ctx.bar.signal)
             self.ret.append(0)
-            self.market_value(0)
+            self.market_value.append(0)
 
         else:      # 非回测起始日
             if self.total_position[-1] == 0:  # 上个交易日没有持仓头寸
@@ -68,14 +119,58 @@ class Broker:
                 self.ret.append(self.total_position[-1] * (exercise_price - self.ctx.bar.lastclose))
                 self.total_position.append(0)
                 self.market_value.append(0)
-                self.close_date.extend([self.ctx.time] * (len(self.open_date) - len(self.close_date)))
-
-
-
-
-
-
-
-
-
-
+                # 所有未平仓的开仓记录以当前bar平仓
+                close_num = len(self.open_date) - len(self.close_date)
+                self.close_date.extend([self.ctx.time] * close_num)
+                self.close_price.extend([exercise_price] * close_num)
+
+    def hold(self, signal, low, close, lastclose):
+        """
+        稀疏事件模式下批量处理信号不变的bar，按上一bar头寸逐bar盯市，与逐bar调用order_open/order_close结果一致
+        遇到累计收益可能触发增仓的bar时停止，返回已处理的bar数，该bar需交由策略on_tick处理
+        """
+        n = len(close)
+        pos = self.total_position[-1]
+        if pos == 0:
+            if signal != 0:  # 有信号却未开仓，无法推断策略行为
+                return 0
+            self.total_position.extend([0] * n)
+            self.ret.extend([0] * n)
+            self.market_value.extend([0] * n)
+            return n
+
+        ret = pos * (close - lastclose)
+        if isinstance(self.ret, TypedColumn):  # 与逐bar写入预分配数组时的舍入保持一致
+            ret = ret.astype(self.ret.values.dtype)
+        # 与order_open中_cum_ret相同的顺序依次累加，得到每个bar开始时的累计收益
+        cum_ret = np.cumsum(np.concatenate(([self._cum_ret()], ret[:-1])))
+        # 行权价不低于当日最低价，累计收益达到(头寸+1)*最低价时可能增仓，略微放宽以免浮点误差漏判
+        trigger = np.flatnonzero(cum_ret >= (abs(pos) + 1) * low * (1 - 1e-9))
+        if len(trigger) > 0:
+            n = trigger[0]
+        if isinstance(self.ret, TypedColumn):  # 直接写入预分配数组的切片
+            self.total_position.extend(np.full(n, pos))
+            self.ret.extend(ret[:n])
+            self.market_value.extend(abs(pos) * close[:n])
+        else:
+            self.total_position.extend([pos] * n)
+            self.ret.extend(ret[:n].tolist())
+            self.market_value.extend((abs(pos) * close[:n]).tolist())
+        return n
+
+    def compact(self):
+        """
+        float32精度模式下，回测结束后将各结果列表及预分配数组转换为紧凑的numpy数组：
+        收益、市值、价格为float32，头寸为int32，开平仓日期为其在回测日历中的int32序号
+        """
+        if self.precision != "float32" or self.is_compact:
+            return
+        tick_idx = {tick: i for i, tick in enumerate(self.ctx.trade_calc)}
+        for name in ("ret", "market_value", "open_price", "close_price"):
+            setattr(self, name, np.asarray(getattr(self, name), dtype=COMPACT_DTYPES["price"]))
+        for name in ("total_position", "order_position"):
+            setattr(self, name, np.asarray(getattr(self, name), dtype=COMPACT_DTYPES["position"]))
+        for name in ("open_date", "close_date"):
+            setattr(self, name, np.array([tick_idx[tick] for tick in getattr(self, name)],
+                                         dtype=COMPACT_DTYPES["date"]))
+        self.is_compact = True
@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+
+"""
+回测状态的断点保存与恢复
+
+文件格式为紧凑的二进制格式：
+    magic(4字节) | version(uint16) | crc32(uint32) | length(uint32) | payload
+其中payload为经zlib压缩的pickle数据，内容为Scheduler.get_state返回的状态字典
+"""
+
+import os
+import pickle
+import struct
+import zlib
+
+
+MAGIC = b"MTCK"
+VERSION = 2
+_HEADER = struct.Struct("<4sHII")
+
+
+def dumps_state(state):
+    """将回测状态序列化为二进制数据"""
+    payload = zlib.compress(pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL))
+    return _HEADER.pack(MAGIC, VERSION, zlib.crc32(payload), len(payload)) + payload
+
+
+def loads_state(data):
+    """从二进制数据中恢复回测状态"""
+    if len(data) < _HEADER.size:
+        raise ValueError("checkpoint data is truncated")
+    magic, version, crc, length = _HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError("not a backtest checkpoint")
+    if version != VERSION:
+        raise ValueError("unsupported checkpoint version: %d" % version)
+    payload = data[_HEADER.size:_HEADER.size + length]
+    if len(payload) != length or zlib.crc32(payload) != crc:
+        raise ValueError("checkpoint data is corrupted")
+    return pickle.loads(zlib.decompress(payload))
+
+
+def save_checkpoint(path, state):
+    """将回测状态写入断点文件，先写临时文件再替换以免中断时损坏原有断点"""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(dumps_state(state))
+    os.replace(tmp_path, path)
+
+
+def load_checkpoint(path):
+    """读取断点文件并返回回测状态"""
+    with open(path, "rb") as f:
+        return loads_state(f.read())
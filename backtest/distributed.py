@@ -0,0 +1,325 @@
+# -*- coding: utf-8 -*-
+
+"""
+此文件提供多机参数扫描的分布式执行功能
+
+Coordinator将参数集合切分为分片(shard)，连同feed的引用(而非DataFrame本身)发送给各Worker，
+Worker按引用加载并缓存feed，逐个参数运行Strategy回测，只返回紧凑的结果记录：
+净值指标表以及可选的交易统计指标与降采样净值曲线。单个参数回测出错只影响该参数的记录，
+Worker断开时分片会被重新分配，直至达到重试次数。
+
+消息通过Transport传输，LocalTransport用于单进程内测试，SocketTransport在TCP连接上以
+长度前缀的pickle帧传输消息，只应在可信网络内使用。
+"""
+
+import pickle
+import queue
+import socket
+import struct
+import threading
+import traceback
+
+import pandas as pd
+
+from .performance import annual_return, annual_vol, max_drawdown, sharpe_ratio, calmar_ratio
+from .report import downsample
+from .utils import logger
+
+
+# ================================
+# 传输层
+# ================================
+
+class LocalTransport:
+    """基于队列的进程内传输，用于测试或单机多线程运行"""
+
+    def __init__(self, inbox, outbox):
+        self._inbox = inbox
+        self._outbox = outbox
+
+    @classmethod
+    def pair(cls):
+        """返回一对互相连接的传输端：(coordinator端, worker端)"""
+        a, b = queue.Queue(), queue.Queue()
+        return cls(a, b), cls(b, a)
+
+    def send(self, msg):
+        self._outbox.put(msg)
+
+    def recv(self, timeout=None):
+        """接收一条消息，timeout秒内没有消息时抛出TimeoutError"""
+        try:
+            msg = self._inbox.get(timeout=timeout)
+        except queue.Empty:
+            raise TimeoutError("no message within %s seconds" % timeout)
+        if msg is None:
+            raise ConnectionError("transport closed")
+        return msg
+
+    def close(self):
+        self._outbox.put(None)
+
+
+class SocketTransport:
+    """基于TCP连接的传输，每条消息为4字节长度前缀加pickle数据"""
+
+    _HEADER = struct.Struct("<I")
+
+    def __init__(self, sock):
+        self._sock = sock
+
+    @classmethod
+    def connect(cls, address, timeout=None):
+        return cls(socket.create_connection(address, timeout=timeout))
+
+    def send(self, msg):
+        data = pickle.dumps(msg, protocol=pickle.HIGHEST_PROTOCOL)
+        self._sock.sendall(self._HEADER.pack(len(data)) + data)
+
+    def recv(self, timeout=None):
+        """接收一条消息，timeout秒内没有数据时抛出socket.timeout(TimeoutError的子类)"""
+        self._sock.settimeout(timeout)
+        length, = self._HEADER.unpack(self._recv_exact(self._HEADER.size))
+        return pickle.loads(self._recv_exact(length))
+
+    def _recv_exact(self, size):
+        buf = bytearray()
+        while len(buf) < size:
+            chunk = self._sock.recv(size - len(buf))
+            if not chunk:
+                raise ConnectionError("transport closed")
+            buf.extend(chunk)
+        return bytes(buf)
+
+    def close(self):
+        self._sock.close()
+
+
+# ================================
+# 任务与结果
+# ================================
+
+class Task:
+    """
+    一个回测分片
+    ===========
+    Parameters:
+      strategy_cls: Strategy子类，需可在Worker端按模块路径导入
+      feed: feed引用，由Worker的loader加载
+      benchmark: 基准引用，由Worker的loader加载
+      params: 参数字典列表，每个字典作为关键字参数传给strategy_cls构造函数
+      start_kwargs: 传给Strategy.start的关键字参数，如sparse=True
+      nav_points: 返回降采样净值曲线的分桶数，为None时不返回净值曲线
+      trade_stats: 是否在统计指标表中加入Summary.trade_stat_sheet的交易统计指标
+    """
+
+    def __init__(self, strategy_cls, feed, benchmark, params, start_kwargs=None, nav_points=None,
+                 trade_stats=False):
+        self.strategy_cls = strategy_cls
+        self.feed = feed
+        self.benchmark = benchmark
+        self.params = params
+        self.start_kwargs = start_kwargs or {}
+        self.nav_points = nav_points
+        self.trade_stats = trade_stats
+        self.task_id = None
+        self.attempts = 0
+
+
+def stat_sheet(strategy, trade_stats=False):
+    """
+    返回回测结束后策略的净值指标，trade_stats为True时加入交易统计指标
+    交易统计指标在仍有未平仓头寸、没有亏损交易等情况下无法计算，此时只返回净值指标
+    """
+    nav = strategy.stat.data.CumRet
+    sheet = {
+        "年化收益率": annual_return(nav),
+        "年化波动率": annual_vol(nav),
+        "最大回撤": max_drawdown(nav),
+        "夏普比": sharpe_ratio(nav),
+        "卡尔玛比率": calmar_ratio(nav),
+    }
+    if trade_stats:
+        try:
+            sheet.update(strategy.stat.trade_stat_sheet)
+        except (IndexError, ValueError, ZeroDivisionError):
+            logger.info("trade stats unavailable for %s" % type(strategy).__name__)
+    return sheet
+
+
+# ================================
+# Worker
+# ================================
+
+class Worker:
+    """
+    执行回测分片的工作进程
+    ===========
+    Parameters:
+      transport: 与Coordinator通信的传输端
+      loader: 根据feed/基准引用加载数据的函数，默认按文件路径读取pickle
+    """
+
+    def __init__(self, transport, loader=pd.read_pickle):
+        self.transport = transport
+        self.loader = loader
+        self._cache = {}  # 在任务之间缓存已加载的feed与基准
+
+    def load(self, ref):
+        if ref not in self._cache:
+            self._cache[ref] = self.loader(ref)
+        return self._cache[ref]
+
+    def run_task(self, task):
+        """
+        运行一个分片，返回与params一一对应的结果记录列表
+        单个参数回测出错时只在该参数的记录中返回{"params": params, "error": 错误信息}，不影响同一分片的其他参数
+        """
+        feed = self.load(task.feed)
+        benchmark = self.load(task.benchmark)
+        records = []
+        for params in task.params:
+            try:
+                st = task.strategy_cls(feed, benchmark, **params)
+                st.start(**task.start_kwargs)
+                record = {"params": params, "stat": stat_sheet(st, task.trade_stats)}
+                if task.nav_points is not None:
+                    record["nav"] = downsample(st.stat.data.CumRet, task.nav_points)
+            except Exception:
+                record = {"params": params, "error": traceback.format_exc()}
+            records.append(record)
+        return records
+
+    def serve(self):
+        """
+        循环接收并执行任务，直到收到stop消息或连接断开
+        无法解码的消息(如Worker端无法导入的策略类)回复("error", None, 错误信息)，Worker继续等待下一条消息
+        """
+        while True:
+            try:
+                msg = self.transport.recv()
+            except ConnectionError:
+                return
+            except Exception:
+                logger.info("failed to decode message from coordinator")
+                self.transport.send(("error", None, traceback.format_exc()))
+                continue
+            if msg[0] == "stop":
+                return
+            task = msg[1]
+            try:
+                self.transport.send(("result", task.task_id, self.run_task(task)))
+            except Exception:
+                self.transport.send(("error", task.task_id, traceback.format_exc()))
+
+    @classmethod
+    def listen(cls, address, loader=pd.read_pickle):
+        """
+        在address上监听，依次为每个连接的Coordinator提供服务，feed缓存在连接之间保留
+        单个连接出错时关闭该连接并继续监听
+        """
+        server = socket.create_server(address)
+        worker = cls(None, loader)
+        while True:
+            conn, _ = server.accept()
+            worker.transport = SocketTransport(conn)
+            try:
+                worker.serve()
+            except Exception:
+                logger.info("connection failed: %s" % traceback.format_exc())
+            finally:
+                worker.transport.close()
+
+
+# ================================
+# Coordinator
+# ================================
+
+class Coordinator:
+    """
+    分发回测分片并收集结果
+    ===========
+    Parameters:
+      transports: 与各Worker通信的传输端列表
+      retries: Worker断开后分片的最大重试次数，回测本身的错误不会重试
+      timeout: 等待单个分片结果的最长秒数，超时视为Worker断开，为None时一直等待
+    """
+
+    def __init__(self, transports, retries=2, timeout=None):
+        self.transports = transports
+        self.retries = retries
+        self.timeout = timeout
+
+    @staticmethod
+    def shard(strategy_cls, feed, benchmark, param_list, shard_size=10, **kwargs):
+        """将参数集合按shard_size切分为Task列表"""
+        return [Task(strategy_cls, feed, benchmark, param_list[i:i + shard_size], **kwargs)
+                for i in range(0, len(param_list), shard_size)]
+
+    def _serve(self, transport, pending, outcomes):
+        """
+        每个Worker对应一个线程，每次只向Worker发送一个分片以便负载均衡
+        收发失败、超时或收到无法解码的消息时关闭该Worker的连接，分片交由其他Worker重试
+        """
+        while True:
+            task = pending.get()
+            if task is None:
+                return
+            try:
+                transport.send(("task", task))
+                msg = transport.recv(timeout=self.timeout)
+                status, payload = msg[0], msg[2]
+            except Exception:
+                outcomes.put(("dead", task, traceback.format_exc()))
+                try:
+                    transport.close()
+                except Exception:
+                    pass
+                return
+            outcomes.put((status, task, payload))
+
+    def run(self, tasks):
+        """
+        执行全部分片，返回与tasks展开后参数顺序一致的结果记录列表，
+        回测出错或Worker断开超过重试次数的参数对应记录为{"params": params, "error": 错误信息}
+        """
+        pending = queue.Queue()
+        outcomes = queue.Queue()
+        for i, task in enumerate(tasks):
+            task.task_id = i
+            pending.put(task)
+        threads = [threading.Thread(target=self._serve, args=(transport, pending, outcomes), daemon=True)
+                   for transport in self.transports]
+        for thread in threads:
+            thread.start()
+
+        results = {}
+        alive = len(threads)
+        while len(results) < len(tasks):
+            status, task, payload = outcomes.get()
+            if status == "result":
+                results[task.task_id] = payload
+                continue
+            if status == "error":  # 加载feed等确定性错误，重试没有意义
+                results[task.task_id] = [{"params": params, "error": payload} for params in task.params]
+                continue
+            # Worker断开，分片重新分配给其他Worker
+            alive -= 1
+            logger.info("worker disconnected while running task %d: %s" % (task.task_id, payload))
+            task.attempts += 1
+            if task.attempts > self.retries:
+                error = "worker disconnected\n%s" % payload
+                results[task.task_id] = [{"params": params, "error": error} for params in task.params]
+            else:
+                pending.put(task)
+            if alive == 0 and len(results) < len(tasks):
+                raise RuntimeError("all workers disconnected")
+
+        for transport in self.transports:
+            pending.put(None)
+        for transport in self.transports:
+            try:
+                transport.send(("stop",))
+            except (ConnectionError, OSError):
+                pass
+        return [record for i in range(len(tasks)) for record in results[i]]
@@ -133,13 +133,15 @@ def to_drawdown_series(prices):
     return np.around(drawdown * 100, decimals=2)
 
 
-def drawdown_details(prices, ascending=True, index_type=pd.DatetimeIndex):
+def drawdown_details(prices, ascending=True, index_type=pd.DatetimeIndex, drawdown=None):
     """
     根据价格序列计算并返回回撤信息：包括起始日期、结束日期、持续时间以及回撤幅度.
     持续日期为实际日历日，并非交易日.
+    drawdown: 已计算好的回撤序列，为None时根据价格序列计算
     """
     # 计算回撤序列
-    drawdown = to_drawdown_series(prices)
+    if drawdown is None:
+        drawdown = to_drawdown_series(prices)
 
     is_zero = drawdown == 0
     # 找到起始日 (回撤值为0后第一个回撤值非零日期)
@@ -203,15 +205,18 @@ def show_worst_drawdown_periods(prices, top=5):
 # 相关绘图函数
 # =========================================
 
-def plot_drawdown_periods(prices, top=5, **kwargs):
+def plot_drawdown_periods(prices, top=5, ax=None, drawdowns=None, **kwargs):
     """
     绘图累计净值曲线并显示几个最糟糕回撤期间。
+    drawdowns: 已计算好的drawdown_details结果，为None时根据价格序列计算
     """
-
-    fig, ax = plt.subplots(figsize=(10, 5))
+    if ax is None:
+        fig, ax = plt.subplots(figsize=(10, 5))
 
     prices.plot(ax=ax, color='blue', lw=2.0)
-    drawdowns = (drawdown_details(prices)).iloc[:top]
+    if drawdowns is None:
+        drawdowns = drawdown_details(prices)
+    drawdowns = drawdowns.iloc[:top]
     drawdowns.index = range(len(drawdowns))
 
     lim = ax.get_ylim()
@@ -231,18 +236,21 @@ def plot_drawdown_periods(prices, top=5, **kwargs):
     return ax
 
 
-def plot_drawdown_underwater(prices, **kwargs):
+def plot_drawdown_underwater(prices, ax=None, underwater=None, **kwargs):
     """
     绘图策略累计净值曲线以及回撤曲线
+    underwater: 已计算好的回撤序列，为None时根据价格序列计算
     """
-    fig, ax = plt.subplots(figsize=(10, 5))
+    if ax is None:
+        fig, ax = plt.subplots(figsize=(10, 5))
 
     prices.plot(ax=ax, color='blue', lw=2.0)
     ax.set_ylabel('Cummulative NAV')
     ax.set_title('Cummulative NAV & Underwater plot')
     ax.set_xlabel('Date')
 
-    underwater = to_drawdown_series(prices)
+    if underwater is None:
+        underwater = to_drawdown_series(prices)
     ax2 = ax.twinx()
     underwater.plot(ax=ax2, kind='area', color='coral', alpha=0.7, **kwargs)
     ax2.set_ylabel('Drawdown(%)')
@@ -306,14 +314,16 @@ def plot_holding_days_dist(holdings, bins=10, ax=None, **kwargs):
     return ax
 
 
-def plot_monthly_returns_heatmap(returns, ax=None, **kwargs):
+def plot_monthly_returns_heatmap(returns, ax=None, monthly_ret_table=None, **kwargs):
     """
     根据策略日频收益计算月频收益并绘制月频收益热力图
+    monthly_ret_table: 已计算好的月收益表，为None时根据日收益序列计算
     """
     if ax is None:
         ax = plt.gca()
 
-    monthly_ret_table = to_monthly_returns(returns)
+    if monthly_ret_table is None:
+        monthly_ret_table = to_monthly_returns(returns)
 
     sns.heatmap(
         monthly_ret_table.fillna(0) *
@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+
+"""
+此文件提供相对基准的收益风险指标：beta、alpha、跟踪误差、信息比率、上行/下行捕获率以及滚动beta
+
+所有函数接受一条基准价格序列与多个策略净值序列组成的矩阵(pd.DataFrame, 每列一个策略)，
+基准收益只计算一次，并以对齐后的NumPy矩阵运算一次性得到全部策略的指标。
+各策略只使用基准与自身收益均有效的日期，起始较晚(前段为NaN)的策略不影响其他策略
+"""
+
+import numpy as np
+import pandas as pd
+
+
+def _aligned_returns(benchmark, navs):
+    """
+    按共同日期对齐基准与策略净值并计算日简单收益
+    返回日期索引、基准收益向量(T,)、策略收益矩阵(T, K)以及逐列有效性掩码(T, K)，
+    掩码为True表示当日基准与该策略收益均为有限值，无效位置的收益置为0
+    """
+    if isinstance(navs, pd.Series):
+        navs = navs.to_frame()
+    index = navs.index.intersection(benchmark.index)
+    bench = benchmark.loc[index].values.astype(np.float64)
+    prices = navs.loc[index].values.astype(np.float64)
+    bench_ret = bench[1:] / bench[:-1] - 1.
+    ret = prices[1:] / prices[:-1] - 1.
+    valid = np.isfinite(ret) & np.isfinite(bench_ret)[:, None]
+    ret = np.where(valid, ret, 0.)
+    bench_ret = np.where(np.isfinite(bench_ret), bench_ret, 0.)
+    return index[1:], navs.columns, bench_ret, ret, valid
+
+
+def _divide(a, b):
+    """逐元素相除，分母为0时返回NaN"""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(b != 0, a / b, np.nan)
+
+
+def relative_stats(benchmark, navs, year_days=245, free_risk_rate=3.):
+    """
+    根据基准价格序列与策略净值矩阵计算相对指标，一年按245个交易日计算，无风险收益率设定为3.
+    返回以策略为索引的DataFrame：
+      Beta: 策略收益对基准收益的beta
+      Alpha(%): 年化詹森alpha
+      TrackingError(%): 年化跟踪误差
+      InformationRatio: 信息比率，跟踪误差为0时为NaN
+      UpCapture / DownCapture: 基准上涨/下跌日策略平均收益与基准平均收益之比
+    """
+    _, columns, bench_ret, ret, valid = _aligned_returns(benchmark, navs)
+    daily_free = free_risk_rate / 100. / year_days
+    count = valid.sum(axis=0)
+    bench = np.where(valid, bench_ret[:, None], 0.)
+
+    bench_mean = _divide(bench.sum(axis=0), count)
+    ret_mean = _divide(ret.sum(axis=0), count)
+    bench_demean = np.where(valid, bench - bench_mean, 0.)
+    ret_demean = np.where(valid, ret - ret_mean, 0.)
+    beta = _divide((bench_demean * ret_demean).sum(axis=0), (bench_demean ** 2).sum(axis=0))
+    alpha = ((ret_mean - daily_free) - beta * (bench_mean - daily_free)) * year_days
+
+    active = ret - bench
+    active_mean = _divide(active.sum(axis=0), count)
+    active_var = _divide((np.where(valid, active - active_mean, 0.) ** 2).sum(axis=0), count)
+    tracking_error = np.sqrt(active_var) * np.sqrt(year_days)
+    info_ratio = _divide(active_mean * year_days, tracking_error)
+
+    up = valid & (bench_ret > 0)[:, None]
+    down = valid & (bench_ret < 0)[:, None]
+    up_capture = _divide((ret * up).sum(axis=0), (bench * up).sum(axis=0))
+    down_capture = _divide((ret * down).sum(axis=0), (bench * down).sum(axis=0))
+
+    return pd.DataFrame({"Beta": np.around(beta, decimals=2),
+                         "Alpha(%)": np.around(100 * alpha, decimals=2),
+                         "TrackingError(%)": np.around(100 * tracking_error, decimals=2),
+                         "InformationRatio": np.around(info_ratio, decimals=2),
+                         "UpCapture": np.around(up_capture, decimals=2),
+                         "DownCapture": np.around(down_capture, decimals=2)}, index=columns)
+
+
+def rolling_beta(benchmark, navs, window=60):
+    """
+    根据基准价格序列与策略净值矩阵计算滚动beta，窗口默认为60个交易日
+    通过累计和一次性得到所有窗口的协方差与方差，窗口内存在无效收益时为NaN，返回与策略净值矩阵同列的DataFrame
+    """
+    index, columns, bench_ret, ret, valid = _aligned_returns(benchmark, navs)
+    if len(bench_ret) < window:
+        return pd.DataFrame(columns=columns, dtype=np.float64)
+
+    def window_sum(x):
+        cum = np.cumsum(np.concatenate((np.zeros((1,) + x.shape[1:]), x)), axis=0)
+        return cum[window:] - cum[:-window]
+
+    bench = np.where(valid, bench_ret[:, None], 0.)
+    count = window_sum(valid.astype(np.float64))
+    sum_b = window_sum(bench)
+    sum_bb = window_sum(bench ** 2)
+    sum_r = window_sum(ret)
+    sum_br = window_sum(bench * ret)
+    cov = sum_br - sum_b * sum_r / window
+    var = sum_bb - sum_b ** 2 / window
+    beta = np.where(count == window, _divide(cov, var), np.nan)
+    return pd.DataFrame(beta, index=index[window - 1:], columns=columns)
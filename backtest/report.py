@@ -0,0 +1,190 @@
+# -*- coding: utf-8 -*-
+
+"""
+此文件提供无界面的批量回测报告生成功能
+
+回撤序列、回撤明细、月度收益以及交易记录只计算一次并在各图表间共享，
+净值与回撤曲线按像素分桶保留最小/最大值降采样后再绘图，
+图表直接使用Agg画布渲染，不依赖pyplot的全局状态，可在多进程中并行输出PNG/SVG/HTML文件
+"""
+
+import base64
+import html
+import io
+import os
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from functools import cached_property
+
+import numpy as np
+import pandas as pd
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+from .performance import (to_returns, to_monthly_returns, to_drawdown_series, drawdown_details,
+                          plot_drawdown_periods, plot_drawdown_underwater, plot_monthly_returns_heatmap,
+                          plot_order_returns_dist, plot_holding_days_dist)
+
+
+FORMATS = ("png", "svg", "html")
+
+
+def _check_name(name):
+    """报告名称用作输出文件名，不能为空或包含路径分隔符"""
+    if not name or name in (".", "..") or "/" in name or "\\" in name:
+        raise ValueError("report name must be a plain file name, got %r" % name)
+
+
+def downsample(series, buckets=1000):
+    """
+    按像素分桶对序列降采样：每个桶保留最小值与最大值所在的点，并保留首尾两点，
+    可保留曲线的峰谷形状，输出点数不超过2 * buckets + 2
+    """
+    n = len(series)
+    if n <= 2 * buckets + 2:
+        return series
+    values = series.values.astype(np.float64)
+    edges = np.linspace(0, n, buckets + 1).astype(np.int64)
+    starts = edges[:-1]
+    bucket_id = np.repeat(np.arange(buckets), np.diff(edges))
+
+    keep = [np.array([0, n - 1])]
+    for reduce in (np.fmin, np.fmax):
+        extreme = reduce.reduceat(values, starts)
+        # 每个桶中第一个取到极值的位置
+        hit = np.flatnonzero(values == extreme[bucket_id])
+        _, first = np.unique(bucket_id[hit], return_index=True)
+        keep.append(hit[first])
+    return series.iloc[np.unique(np.concatenate(keep))]
+
+
+class Report:
+    """
+    单个策略的回测报告
+    ===========
+    Parameters:
+      prices: pd.Series, 策略累计净值序列，如Summary.data.CumRet
+      order_list: pd.DataFrame, 交易记录，如Summary.order_list，为None时不绘制交易分布图
+      name: 报告名称，用作输出文件名，批量输出时必须唯一
+      top: 显示最糟糕回撤期间的个数
+      buckets: 曲线降采样的分桶数，约等于图表横向像素数
+    """
+
+    def __init__(self, prices, order_list=None, name="strategy", top=5, buckets=1000):
+        self.prices = prices
+        self.order_list = order_list
+        self.name = name
+        self.top = top
+        self.buckets = buckets
+
+    @classmethod
+    def from_strategy(cls, strategy, name=None, **kwargs):
+        """根据回测结束后的策略实例创建报告"""
+        name = name or type(strategy).__name__
+        broker = strategy.ctx.broker
+        # 回测结束时仍有未平仓头寸时交易记录不完整，不绘制交易分布图
+        order_list = strategy.stat.order_list if len(broker.close_date) == len(broker.open_date) else None
+        return cls(strategy.stat.data.CumRet, order_list, name=name, **kwargs)
+
+    @cached_property
+    def returns(self):
+        return to_returns(self.prices)
+
+    @cached_property
+    def drawdown(self):
+        return to_drawdown_series(self.prices)
+
+    @cached_property
+    def drawdown_details(self):
+        details = drawdown_details(self.prices, drawdown=self.drawdown)
+        if details is None:  # 净值从未回撤
+            details = pd.DataFrame(columns=('Start', 'Valley', 'End', 'Duration', 'Drawdown(%)'))
+        return details
+
+    @cached_property
+    def monthly_returns(self):
+        return to_monthly_returns(self.returns)
+
+    def figure(self):
+        """在Agg画布上绘制报告的全部图表"""
+        rows = 3 if self.order_list is None else 4
+        fig = Figure(figsize=(10, 5 * rows))
+        FigureCanvasAgg(fig)
+        grid = fig.add_gridspec(rows, 2)
+
+        prices = downsample(self.prices, self.buckets)
+        plot_drawdown_periods(prices, top=self.top, ax=fig.add_subplot(grid[0, :]),
+                              drawdowns=self.drawdown_details)
+        plot_drawdown_underwater(prices, ax=fig.add_subplot(grid[1, :]),
+                                 underwater=downsample(self.drawdown, self.buckets))
+        plot_monthly_returns_heatmap(self.returns, ax=fig.add_subplot(grid[2, :]),
+                                     monthly_ret_table=self.monthly_returns)
+        if self.order_list is not None:
+            plot_order_returns_dist(self.order_list.holding_ret, ax=fig.add_subplot(grid[3, 0]))
+            plot_holding_days_dist(self.order_list.holding_days, ax=fig.add_subplot(grid[3, 1]))
+        fig.suptitle(self.name)
+        fig.tight_layout()
+        return fig
+
+    def to_html(self, fig=None):
+        """生成包含内嵌图表、最糟糕回撤期间、月度收益以及交易记录的HTML页面"""
+        fig = fig or self.figure()
+        buf = io.BytesIO()
+        fig.savefig(buf, format="png")
+        img = base64.b64encode(buf.getvalue()).decode("ascii")
+        name = html.escape(self.name)
+        parts = ["<html><head><meta charset='utf-8'><title>%s</title></head><body>" % name,
+                 "<h1>%s</h1>" % name,
+                 "<img src='data:image/png;base64,%s'/>" % img,
+                 "<h2>Worst drawdown periods</h2>",
+                 self.drawdown_details.iloc[:self.top].to_html(),
+                 "<h2>Monthly returns</h2>",
+                 self.monthly_returns.to_html()]
+        if self.order_list is not None:
+            parts.extend(["<h2>Orders</h2>", self.order_list.to_html()])
+        parts.append("</body></html>")
+        return "\n".join(parts)
+
+    def save(self, out_dir, formats=("png",)):
+        """将报告输出到out_dir，返回输出的文件路径列表"""
+        _check_name(self.name)
+        for fmt in formats:
+            if fmt not in FORMATS:
+                raise ValueError("format must be one of %s, got %r" % (FORMATS, fmt))
+        fig = self.figure()
+        paths = []
+        for fmt in formats:
+            path = os.path.join(out_dir, "%s.%s" % (self.name, fmt))
+            if fmt == "html":
+                with open(path, "w", encoding="utf-8") as f:
+                    f.write(self.to_html(fig))
+            else:
+                fig.savefig(path, format=fmt)
+            paths.append(path)
+        return paths
+
+
+def _save_report(report, out_dir, formats):
+    return report.save(out_dir, formats)
+
+
+def render_reports(reports, out_dir, formats=("png",), processes=None):
+    """
+    批量输出策略报告
+    reports: Report对象列表，名称必须互不相同，否则输出文件会相互覆盖
+    processes: 并行进程数，默认为CPU核数，为1时在当前进程中依次输出
+    返回每个报告输出的文件路径列表
+    """
+    names = Counter(report.name for report in reports)
+    for name in names:
+        _check_name(name)
+    duplicates = sorted(name for name, count in names.items() if count > 1)
+    if duplicates:
+        raise ValueError("duplicate report names: %s" % ", ".join(duplicates))
+
+    os.makedirs(out_dir, exist_ok=True)
+    if processes == 1:
+        return [report.save(out_dir, formats) for report in reports]
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        futures = [executor.submit(_save_report, report, out_dir, formats) for report in reports]
+        return [future.result() for future in futures]
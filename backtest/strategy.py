@@ -1,11 +1,14 @@
 # -*- coding: utf-8 -*-
 
 
+import os
 from abc import ABC, abstractmethod
 from collections import UserDict
 from itertools import chain
+import numpy as np
 from .broker import Broker
-from .utils import logger
+from .checkpoint import save_checkpoint, load_checkpoint
+from .utils import logger, check_precision, compact_feed, COMPACT_DTYPES
 from .summary import Summary
 
 
@@ -19,6 +22,11 @@ class Context(UserDict):
         self["time"] = tick
         self["bar"] = self["feed"].loc[tick]
 
+def _attrs(obj):
+    """返回对象除ctx以外的全部属性，用于断点保存"""
+    return {k: v for k, v in vars(obj).items() if k != "ctx"}
+
+
 class Scheduler(object):
     """
     整个回测过程中的调度中心, 通过一个个tick来驱动回测逻辑
@@ -38,6 +46,8 @@ class Scheduler(object):
         self._pre_hook_lst = []
         self._post_hook_lst = []
         self._runner_lst = []
+        self._pos = 0  # 回测日历中下一个待处理tick的位置
+        self._event_lst = []  # 稀疏事件模式下用户注册的日历事件
 
     def add_feed(self, feed):
         self.ctx["feed"] = feed
@@ -64,7 +74,86 @@ class Scheduler(object):
         elif typ == "pre" and hook not in self._pre_hook_lst:
             self._pre_hook_lst.append(hook)
 
-    def run(self):
+    def add_event(self, *ticks):
+        """注册日历事件，稀疏事件模式下在这些tick上必定调用on_tick"""
+        self._event_lst.extend(ticks)
+
+    def get_state(self):
+        """返回回测状态：日历位置、broker各列表及配置、策略用户状态以及hook状态"""
+        hook_lst = chain(self._pre_hook_lst, self._post_hook_lst)
+        return {
+            "pos": self._pos,
+            "last_tick": self.ctx.trade_calc[self._pos - 1] if self._pos > 0 else None,
+            "broker": self.ctx.broker.get_state(),
+            "broker_config": self.ctx.broker.config,
+            "strategy": self.ctx.st.get_state(),
+            "hooks": [_attrs(hook) for hook in hook_lst],
+        }
+
+    def set_state(self, state):
+        """从get_state返回的状态中恢复回测，要求回测日历已处理部分与断点一致"""
+        pos = state["pos"]
+        if pos > len(self.ctx.trade_calc) or \
+                (pos > 0 and self.ctx.trade_calc[pos - 1] != state["last_tick"]):
+            raise ValueError("checkpoint does not match the trade calendar")
+        if state["broker_config"] != self.ctx.broker.config:
+            raise ValueError("checkpoint does not match the broker config: %r" % state["broker_config"])
+        hook_lst = list(chain(self._pre_hook_lst, self._post_hook_lst))
+        if len(hook_lst) != len(state["hooks"]):
+            raise ValueError("checkpoint does not match the registered hooks")
+
+        self.ctx.broker.set_state(state["broker"])
+        self.ctx.st.set_state(state["strategy"])
+        for hook, attrs in zip(hook_lst, state["hooks"]):
+            vars(hook).update(attrs)
+        self._pos = pos
+
+    def _run_ticks(self):
+        """逐tick驱动策略"""
+        for tick in self.ctx.trade_calc[self._pos:]:
+            self.ctx.set_bar(tick)
+            self.ctx.st.run(tick)
+            self._pos += 1
+
+    def _run_events(self):
+        """
+        稀疏事件模式：只在信号变化、用户注册的日历事件以及可能增仓的bar上调用on_tick，
+        其余bar由broker按持有头寸批量盯市
+        """
+        trade_calc = self.ctx.trade_calc
+        n = len(trade_calc)
+        if self._pos >= n:
+            return
+        feed = self.ctx.feed.loc[trade_calc]
+        signal = feed["signal"].values
+        low = feed["low"].values
+        close = feed["close"].values
+        lastclose = feed["lastclose"].values
+
+        is_event = np.zeros(n, dtype=bool)
+        is_event[self._pos] = True
+        is_event[1:] |= signal[1:] != signal[:-1]
+        tick_idx = {tick: i for i, tick in enumerate(trade_calc)}
+        for tick in self._event_lst:
+            if tick in tick_idx:
+                is_event[tick_idx[tick]] = True
+        events = np.append(np.flatnonzero(is_event), n)
+
+        i = self._pos
+        while i < n:
+            if not is_event[i]:
+                j = events[np.searchsorted(events, i)]
+                i += self.ctx.broker.hold(signal[i], low[i:j], close[i:j], lastclose[i:j])
+                if i == n:
+                    break
+            self.ctx.set_bar(trade_calc[i])
+            self.ctx.st.run(trade_calc[i])
+            i += 1
+        # 与逐tick运行保持一致，循环结束时ctx指向最后一个tick
+        self.ctx.set_bar(trade_calc[-1])
+        self._pos = n
+
+    def run(self, checkpoint=None, sparse=False):
         # runner指存在可调用的initialize, finish, run(tick)的对象
         runner_lst = list(chain(self._pre_hook_lst, self._runner_lst, self._post_hook_lst))
         # 循环开始前为broker, strategy, hook等实例绑定ctx对象
@@ -73,10 +162,21 @@ class Scheduler(object):
         # 循环开始前调用broker, strategy, hook等实例initialize方法
         for runner in self._runner_lst:
             runner.initialize()
+        # float32精度模式下为broker逐bar结果预分配定长数组
+        self.ctx.broker.allocate(len(self.ctx.trade_calc))
+        # 存在断点文件时从断点恢复，只处理断点之后新增的tick
+        if checkpoint is not None and os.path.exists(checkpoint):
+            self.set_state(load_checkpoint(checkpoint))
 
-        for tick in self.ctx.trade_calc:
-            self.ctx.set_bar(tick)
-            self.ctx.st.run(tick)
+        if sparse:
+            self._run_events()
+        else:
+            self._run_ticks()
+        # 在finish之前保存断点，保证断点状态与逐tick运行完全一致
+        if checkpoint is not None:
+            save_checkpoint(checkpoint, self.get_state())
+        # float32精度模式下将broker结果转换为紧凑数组
+        self.ctx.broker.compact()
         # 循环结束后调用broker, strategy, hook等实例initialize方法
         for runner in self._runner_lst:
             runner.finish()
@@ -94,29 +194,41 @@ class Strategy(ABC):
             signal:{1,0,-1}, 取值1表示多头，0表示看平或者平仓，-1表示空头
       commission: 每单位头寸交易手续费，默认为2个基点
       slippage: 每单位头寸交易滑点，默认为1个基点
+      precision: 数据存储精度，默认为"float64"；"float32"为紧凑模式，feed与基准价格存储为float32、信号为int8，
+                 回测结束后broker结果转换为float32/int32数组，用于大规模参数扫描时节省内存
 
     """
 
-    def __init__(self, feed, benchmark, commission=2, slippage=1):
+    # 回测引擎内部对象，不属于策略用户状态
+    _engine_attrs = ("feed", "stat", "ctx", "precision", "_sch", "_logger")
+
+    def __init__(self, feed, benchmark, commission=2, slippage=1, precision="float64"):
+        check_precision(precision)
+        self.precision = precision
         # 设置回测起始与结束日期
         start_date = max(feed.index[0], benchmark.index[0])
         end_date = min(feed.index[-1], benchmark.index[-1])
-        self.feed = feed[start_date:end_date]
+        feed = feed[start_date:end_date]
+        benchmark = benchmark[start_date:end_date]
+        if precision == "float32":
+            feed = compact_feed(feed)
+            benchmark = benchmark.astype(COMPACT_DTYPES["price"])
+        self.feed = feed
         self._sch = Scheduler()
         self._logger = logger
         # 设置strategy, broker对象, 以及将自身实例放在调度器的runner_list中
         self._sch.add_runner(self)
         self._sch.add_strategy(self)
 
-        broker = Broker(commission, slippage)
+        broker = Broker(commission, slippage, precision)
         self._sch.add_broker(broker)
 
-        self._sch.add_feed(feed[start_date:end_date])
-        self._sch.add_benchmark(benchmark[start_date:end_date])
+        self._sch.add_feed(feed)
+        self._sch.add_benchmark(benchmark)
         self.stat = Summary()     # 创建统计功能
         self._sch.add_hook(self.stat)
 
-        trade_calc = list(self.feed)  # 回测日历默认为提供数据起始日范围
+        trade_calc = list(self.feed.index)  # 回测日历默认为提供数据起始日范围
         self._sch.add_trade_calc(trade_calc)
 
     def info(self, msg):
@@ -125,15 +237,36 @@ class Strategy(ABC):
     def add_hook(self, *agrs, **kwargs):
         self._sch.add_hook(*agrs, **kwargs)
 
+    def add_event(self, *ticks):
+        self._sch.add_event(*ticks)
+
     def initialize(self):
         """在回测开始前的初始化"""
         pass
 
+    def get_state(self):
+        """
+        返回策略的用户状态，用于断点保存，默认为除回测引擎内部对象外的全部实例属性
+        若策略持有无法pickle的对象，可重写此方法与set_state
+        """
+        return {k: v for k, v in vars(self).items() if k not in self._engine_attrs}
+
+    def set_state(self, state):
+        """从断点中恢复策略的用户状态"""
+        vars(self).update(state)
+
     def run(self, tick):
         self.on_tick(tick)
 
-    def start(self):
-        self._sch.run()
+    def start(self, checkpoint=None, sparse=False):
+        """
+        启动回测
+        checkpoint: 断点文件路径，若文件存在则从断点恢复并只处理新增的tick，
+                    回测循环结束后（finish之前）将最新状态写回该文件
+        sparse: 是否启用稀疏事件模式，只在信号变化、add_event注册的日历事件以及可能增仓的bar上调用on_tick，
+                要求on_tick在信号不变时只按当前信号调用order_open/order_close，且行权价不低于当日最低价
+        """
+        self._sch.run(checkpoint, sparse)
 
     def finish(self):
         """在回测结束后调用"""
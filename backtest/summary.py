@@ -3,6 +3,8 @@
 
 import numpy as np
 import pandas as pd
+from .utils import COMPACT_DTYPES
+from .relative import relative_stats
 
 
 class Summary:
@@ -12,10 +14,14 @@ class Summary:
     @property
     def data(self):
         """返回策略每日持仓头寸，持仓市值、基点收益、策略净值、基准指数净值等数据"""
-        cum_ret = np.cumsum(np.array(self.ctx.broker.ret) + self.ctx.benchmark.iloc[0])
-        df = pd.DataFrame({"Position": self.ctx.broker.total_position,
-                           "MarketValue": self.ctx.broker.market_value,
-                           "BasisRet": self.ctx.broker.ret,
+        # 策略净值以基准起始点位为初始资金累加基点收益
+        # 累计收益始终按float64累加，避免float32精度模式下误差随时间累积
+        cum_ret = self.ctx.benchmark.iloc[0] + np.cumsum(np.asarray(self.ctx.broker.ret, dtype=np.float64))
+        if self.ctx.broker.is_compact:
+            cum_ret = cum_ret.astype(COMPACT_DTYPES["price"])
+        df = pd.DataFrame({"Position": np.asarray(self.ctx.broker.total_position),
+                           "MarketValue": np.asarray(self.ctx.broker.market_value),
+                           "BasisRet": np.asarray(self.ctx.broker.ret),
                            "CumRet": cum_ret,
                            "BenchMark": self.ctx.benchmark}, index=self.ctx.trade_calc)
         df.index.name = "Date"
@@ -24,16 +30,23 @@ class Summary:
     @property
     def order_list(self):
         """返回订单信息：包括每笔交易开仓日期、开仓价格、平仓日期、平仓价格、期间收益以及持仓时间"""
-        holding_days = []
-        for i in range(len(self.ctx.broker.open_date)):
-            delta = self.ctx.trade_calc.index(self.ctx.broker.close_date[i]) - \
-                    self.ctx.trade_calc.index(self.ctx.broker.open_date[i])
-            holding_days.append(delta)
+        if self.ctx.broker.is_compact:  # 紧凑模式下开平仓日期存储为回测日历中的序号
+            open_date = [self.ctx.trade_calc[i] for i in self.ctx.broker.open_date]
+            close_date = [self.ctx.trade_calc[i] for i in self.ctx.broker.close_date]
+            holding_days = self.ctx.broker.close_date - self.ctx.broker.open_date
+        else:
+            open_date = self.ctx.broker.open_date
+            close_date = self.ctx.broker.close_date
+            holding_days = []
+            for i in range(len(self.ctx.broker.open_date)):
+                delta = self.ctx.trade_calc.index(self.ctx.broker.close_date[i]) - \
+                        self.ctx.trade_calc.index(self.ctx.broker.open_date[i])
+                holding_days.append(delta)
         holding_ret = (np.array(self.ctx.broker.close_price) - np.array(self.ctx.broker.open_price)) * \
                       np.array(self.ctx.broker.order_position)
         df = pd.DataFrame({"position": self.ctx.broker.order_position,
-                           "start_date": self.ctx.broker.open_date,
-                           "end_date": self.ctx.broker.close_date,
+                           "start_date": open_date,
+                           "end_date": close_date,
                            "open_price": self.ctx.broker.open_price,
                            "close_price": self.ctx.broker.close_price,
                            "holding_ret": holding_ret,
@@ -69,11 +82,12 @@ class Summary:
     @property
     def max_empty_days(self):
         """返回最长空仓周期"""
-        length = len(self.order_list)
+        order_list = self.order_list
+        length = len(order_list)
         delta_days = []
         for i in range(1, length):
-            ipx1 = self.ctx.trade_calc.index(self.order_list.iloc[i,"start_date"])
-            ipx2 = self.ctx.trade_calc.index(self.order_list.iloc[i-1,"end_date"])
+            ipx1 = self.ctx.trade_calc.index(order_list.start_date.iloc[i])
+            ipx2 = self.ctx.trade_calc.index(order_list.end_date.iloc[i-1])
             delta_days.append(ipx1-ipx2)
         return max(delta_days)
 
@@ -125,17 +139,17 @@ class Summary:
     @property
     def long_gain_avg(self):
         """返回多头平均盈利"""
-        return np.mean(self.order_list[self.order_list.position>0&self.order_list.holding_ret>=0]["holding_ret"])
+        return np.mean(self.order_list[(self.order_list.position>0)&(self.order_list.holding_ret>=0)]["holding_ret"])
 
     @property
     def long_loss_avg(self):
         """返回多头平均亏损"""
-        return np.mean(self.order_list[self.order_list.position>0&self.order_list.holding_ret<0]["holding_ret"])
+        return np.mean(self.order_list[(self.order_list.position>0)&(self.order_list.holding_ret<0)]["holding_ret"])
 
     @property
     def long_win_rate(self):
         """返回多头胜率"""
-        return len(self.order_list[self.order_list.position>0&self.order_list.holding_ret>=0])/self.long_num
+        return len(self.order_list[(self.order_list.position>0)&(self.order_list.holding_ret>=0)])/self.long_num
 
     @property
     def long_win_loss_ratio(self):
@@ -160,23 +174,29 @@ class Summary:
     @property
     def short_gain_avg(self):
         """返回空头平均盈利"""
-        return np.mean(self.order_list[self.order_list.position<0&self.order_list.holding_ret>=0]["holding_ret"])
+        return np.mean(self.order_list[(self.order_list.position<0)&(self.order_list.holding_ret>=0)]["holding_ret"])
 
     @property
     def short_loss_avg(self):
         """返回空头平均亏损"""
-        return np.mean(self.order_list[self.order_list.position<0&self.order_list.holding_ret<0]["holding_ret"])
+        return np.mean(self.order_list[(self.order_list.position<0)&(self.order_list.holding_ret<0)]["holding_ret"])
 
     @property
     def short_win_rate(self):
         """返回空头胜率"""
-        return len(self.order_list[self.order_list.position<0&self.order_list.holding_ret>=0])/self.short_num
+        return len(self.order_list[(self.order_list.position<0)&(self.order_list.holding_ret>=0)])/self.short_num
 
     @property
     def short_win_loss_ratio(self):
         """返回多头盈亏比"""
         return abs(self.short_gain_avg / self.short_loss_avg)
 
+    @property
+    def relative_stat_sheet(self):
+        """返回策略净值相对基准指数的beta、alpha、跟踪误差、信息比率以及上行/下行捕获率"""
+        data = self.data
+        return relative_stats(data.BenchMark, data.CumRet).iloc[0].to_dict()
+
     @property
     def trade_stat_sheet(self):
         dicts = {
@@ -1,7 +1,65 @@
 # -*- coding: utf-8 -*-
 
 import logging
+import numpy as np
 
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
-logger = logging.getLogger("backtest")
\ No newline at end of file
+logger = logging.getLogger("backtest")
+
+
+# float32精度模式下各类数据的存储类型
+# date为日期在回测日历中的序号，而非日历日序数，以兼容日内bar
+COMPACT_DTYPES = {"price": np.float32, "signal": np.int8, "position": np.int32, "date": np.int32}
+PRECISIONS = ("float64", "float32")
+
+
+def check_precision(precision):
+    if precision not in PRECISIONS:
+        raise ValueError("precision must be one of %s, got %r" % (PRECISIONS, precision))
+
+
+def compact_feed(feed):
+    """将feed的价格列转换为float32，信号列转换为int8"""
+    dtypes = {col: COMPACT_DTYPES["price"] for col in feed.columns if feed[col].dtype.kind == "f"}
+    if "signal" in feed.columns:
+        dtypes["signal"] = COMPACT_DTYPES["signal"]
+    return feed.astype(dtypes)
+
+
+class TypedColumn:
+    """
+    预分配定长numpy数组的追加式序列，支持append/extend/len/索引/迭代，
+    float32精度模式下用于逐bar记录回测结果，避免在回测过程中保存大量Python浮点与整数对象
+    """
+
+    def __init__(self, size, dtype):
+        self.values = np.zeros(size, dtype=dtype)
+        self.size = 0
+
+    def append(self, value):
+        self.values[self.size] = value
+        self.size += 1
+
+    def extend(self, values):
+        values = np.asarray(values)
+        self.values[self.size:self.size + len(values)] = values
+        self.size += len(values)
+
+    def clear(self):
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def __getitem__(self, item):
+        return self.values[:self.size][item]
+
+    def __iter__(self):
+        return iter(self.values[:self.size])
+
+    def __array__(self, dtype=None, copy=None):
+        values = self.values[:self.size]
+        if dtype is not None:
+            values = values.astype(dtype, copy=False)
+        return values.copy() if copy else values
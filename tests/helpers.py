@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+
+import numpy as np
+import pandas as pd
+
+from backtest.strategy import Strategy
+
+
+class SignalStrategy(Strategy):
+    """按信号开平仓的测试策略，flat_dates中的日期强制平仓并注册为日历事件，calls记录on_tick调用次数"""
+
+    def __init__(self, feed, benchmark, flat_dates=(), **kwargs):
+        super().__init__(feed, benchmark, **kwargs)
+        self.flat_dates = set(flat_dates)
+        self.add_event(*flat_dates)
+
+    def initialize(self):
+        self.calls = 0
+
+    def on_tick(self, tick):
+        self.calls += 1
+        if self.ctx.bar.signal != 0 and tick not in self.flat_dates:
+            self.ctx.broker.order_open(self.ctx.bar.open)
+        else:
+            self.ctx.broker.order_close(self.ctx.bar.open)
+
+
+def block_signal(n, values, size):
+    """按values循环生成每段长度为size的信号序列"""
+    return np.resize(np.repeat(values, size), n)
+
+
+def make_feed(n=500, seed=0, drift=0., signal=None):
+    """生成随机游走的feed与基准，signal为None时按收盘价偏离20日均线生成信号"""
+    rng = np.random.RandomState(seed)
+    index = pd.date_range("2015-01-01", periods=n, freq="B")
+    close = 3000. * np.exp(np.cumsum(rng.normal(drift, 0.01, n)))
+    lastclose = np.concatenate(([close[0]], close[:-1]))
+    open_ = lastclose * (1 + rng.normal(0., 0.002, n))
+    if signal is None:
+        ma = pd.Series(close).rolling(20, min_periods=1).mean().values
+        signal = np.where(close > ma * 1.01, 1, np.where(close < ma * 0.99, -1, 0))
+    feed = pd.DataFrame({"open": open_,
+                         "high": np.maximum(open_, close) * 1.005,
+                         "low": np.minimum(open_, close) * 0.995,
+                         "close": close,
+                         "signal": signal,
+                         "lastclose": lastclose}, index=index)
+    return feed, feed["close"].copy()
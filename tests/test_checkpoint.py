@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+
+import pandas as pd
+import pytest
+
+from backtest.checkpoint import MAGIC, dumps_state, loads_state, _HEADER
+from helpers import SignalStrategy, make_feed
+
+
+def run(feed, benchmark, checkpoint=None, sparse=False, **kwargs):
+    st = SignalStrategy(feed, benchmark, **kwargs)
+    st.start(checkpoint=checkpoint, sparse=sparse)
+    return st
+
+
+@pytest.mark.parametrize("precision", ["float64", "float32"])
+@pytest.mark.parametrize("sparse", [False, True])
+def test_resume_matches_full_run(tmp_path, precision, sparse):
+    feed, benchmark = make_feed()
+    path = str(tmp_path / "st.ckpt")
+    full = run(feed, benchmark, sparse=sparse, precision=precision)
+
+    run(feed.iloc[:400], benchmark.iloc[:400], path, sparse=sparse, precision=precision)
+    resumed = run(feed, benchmark, path, sparse=sparse, precision=precision)
+
+    pd.testing.assert_frame_equal(resumed.stat.data, full.stat.data)
+
+
+def test_resume_restores_user_state(tmp_path):
+    feed, benchmark = make_feed()
+    path = str(tmp_path / "st.ckpt")
+    full = run(feed, benchmark)
+
+    partial = run(feed.iloc[:400], benchmark.iloc[:400], path)
+    resumed = run(feed, benchmark, path)
+
+    assert partial.calls == 400
+    assert resumed.calls == full.calls == len(feed)
+
+
+def test_calendar_mismatch_raises(tmp_path):
+    feed, benchmark = make_feed()
+    path = str(tmp_path / "st.ckpt")
+    run(feed.iloc[:400], benchmark.iloc[:400], path)
+
+    with pytest.raises(ValueError, match="trade calendar"):
+        run(feed.iloc[50:], benchmark.iloc[50:], path)
+
+
+def test_broker_config_mismatch_raises(tmp_path):
+    feed, benchmark = make_feed()
+    path = str(tmp_path / "st.ckpt")
+    run(feed.iloc[:400], benchmark.iloc[:400], path)
+
+    with pytest.raises(ValueError, match="broker config"):
+        run(feed, benchmark, path, commission=5.)
+    with pytest.raises(ValueError, match="broker config"):
+        run(feed, benchmark, path, precision="float32")
+
+
+def test_corrupted_data_raises():
+    data = dumps_state({"pos": 1})
+    corrupted = data[:-1] + bytes([data[-1] ^ 0xff])
+    with pytest.raises(ValueError, match="corrupted"):
+        loads_state(corrupted)
+
+
+def test_truncated_data_raises():
+    data = dumps_state({"pos": 1})
+    with pytest.raises(ValueError, match="truncated"):
+        loads_state(data[:_HEADER.size - 1])
+    with pytest.raises(ValueError, match="corrupted"):
+        loads_state(data[:-1])
+
+
+def test_wrong_version_raises():
+    data = dumps_state({"pos": 1})
+    _, version, crc, length = _HEADER.unpack_from(data)
+    data = _HEADER.pack(MAGIC, version + 1, crc, length) + data[_HEADER.size:]
+    with pytest.raises(ValueError, match="version"):
+        loads_state(data)
+
+
+def test_round_trip():
+    state = {"pos": 3, "broker": {"ret": [0., 1.5, -2.]}}
+    assert loads_state(dumps_state(state)) == state
@@ -0,0 +1,187 @@
+# -*- coding: utf-8 -*-
+
+import pickle
+import threading
+
+import pytest
+
+from backtest.distributed import Coordinator, LocalTransport, Worker, stat_sheet
+from helpers import SignalStrategy, block_signal, make_feed
+
+
+FEED, BENCHMARK = make_feed()
+
+
+class Loader:
+    """按引用返回测试数据并记录每次加载"""
+
+    def __init__(self, data=None):
+        self.data = data or {"feed": FEED, "bench": BENCHMARK}
+        self.calls = []
+
+    def __call__(self, ref):
+        self.calls.append(ref)
+        return self.data[ref]
+
+
+def start_workers(n, loader=None, wrap=lambda transport: transport):
+    """启动n个在线程中运行的Worker，返回Coordinator端的传输列表"""
+    transports = []
+    for _ in range(n):
+        coord, end = LocalTransport.pair()
+        worker = Worker(wrap(end), loader or Loader())
+        threading.Thread(target=worker.serve, daemon=True).start()
+        transports.append(wrap(coord))
+    return transports
+
+
+def shard(param_list, shard_size=3, **kwargs):
+    return Coordinator.shard(SignalStrategy, "feed", "bench", param_list, shard_size=shard_size, **kwargs)
+
+
+class DeadTransport:
+    """接收时即断开的传输，断开时设置event"""
+
+    def __init__(self, event=None):
+        self.event = event or threading.Event()
+
+    def send(self, msg):
+        pass
+
+    def recv(self, timeout=None):
+        self.event.set()
+        raise ConnectionError("transport closed")
+
+    def close(self):
+        pass
+
+
+class GatedTransport:
+    """在gate被设置之前阻塞发送，用于控制分片的分配顺序"""
+
+    def __init__(self, transport, gate):
+        self.transport = transport
+        self.gate = gate
+
+    def send(self, msg):
+        self.gate.wait()
+        self.transport.send(msg)
+
+    def recv(self, timeout=None):
+        return self.transport.recv(timeout)
+
+    def close(self):
+        self.transport.close()
+
+
+class GarbledTransport(DeadTransport):
+    """返回格式错误消息的传输"""
+
+    def recv(self, timeout=None):
+        return ("result",)
+
+
+class PickleTransport:
+    """以pickle字节串传输消息，模拟SocketTransport的序列化"""
+
+    def __init__(self, transport):
+        self.transport = transport
+
+    def send(self, msg):
+        self.transport.send(pickle.dumps(msg))
+
+    def recv(self, timeout=None):
+        return pickle.loads(self.transport.recv(timeout))
+
+    def close(self):
+        self.transport.close()
+
+
+def _unloadable():
+    raise ImportError("strategy module not found on worker")
+
+
+class Unloadable:
+    """可以序列化但无法在接收端反序列化的对象"""
+
+    def __reduce__(self):
+        return _unloadable, ()
+
+
+def test_results_follow_param_order_across_shards():
+    param_list = [{"commission": c} for c in range(7)]
+    records = Coordinator(start_workers(2)).run(shard(param_list))
+
+    assert [record["params"] for record in records] == param_list
+    assert all("stat" in record for record in records)
+    st = SignalStrategy(FEED, BENCHMARK, commission=3)
+    st.start()
+    assert records[3]["stat"] == pytest.approx(stat_sheet(st), nan_ok=True)
+
+
+def test_bad_params_only_fail_their_record():
+    param_list = [{"commission": 1}, {"nonexistent": 1}, {"commission": 2}]
+    records = Coordinator(start_workers(1)).run(shard(param_list))
+
+    assert "stat" in records[0] and "stat" in records[2]
+    assert "TypeError" in records[1]["error"]
+
+
+def test_task_requeued_after_worker_disconnects():
+    dead = DeadTransport()
+    good = GatedTransport(start_workers(1)[0], dead.event)
+    tasks = shard([{"commission": c} for c in range(2)], shard_size=1)
+    records = Coordinator([dead, good]).run(tasks)
+
+    assert all("stat" in record for record in records)
+    assert sum(task.attempts for task in tasks) == 1
+
+
+def test_retries_exhausted_gives_error_records():
+    tasks = shard([{"commission": 1}])
+    records = Coordinator([DeadTransport() for _ in range(3)], retries=1).run(tasks)
+
+    assert records[0]["error"].startswith("worker disconnected")
+    assert tasks[0].attempts == 2
+
+
+def test_garbled_reply_treated_as_disconnect():
+    records = Coordinator([GarbledTransport()], retries=0).run(shard([{"commission": 1}]))
+    assert "IndexError" in records[0]["error"]
+
+
+def test_recv_timeout():
+    coord, _ = LocalTransport.pair()
+    records = Coordinator([coord], retries=0, timeout=0.1).run(shard([{"commission": 1}]))
+    assert "TimeoutError" in records[0]["error"]
+
+
+def test_worker_survives_undecodable_task():
+    transports = start_workers(1, wrap=PickleTransport)
+    tasks = shard([{"commission": Unloadable()}, {"commission": 1}], shard_size=1)
+    records = Coordinator(transports).run(tasks)
+
+    assert "ImportError" in records[0]["error"]
+    assert "stat" in records[1]
+
+
+def test_each_worker_loads_feed_once():
+    loaders = [Loader(), Loader()]
+    transports = [start_workers(1, loader)[0] for loader in loaders]
+    records = Coordinator(transports).run(shard([{"commission": c} for c in range(12)], shard_size=2))
+
+    assert all("stat" in record for record in records)
+    for loader in loaders:
+        assert sorted(loader.calls) in ([], ["bench", "feed"])
+
+
+def test_trade_stats_returned():
+    feed, benchmark = make_feed(n=600, signal=block_signal(600, [1, 0, -1, 0], 10))
+    loader = Loader({"feed": feed, "bench": benchmark})
+    records = Coordinator(start_workers(1, loader)).run(shard([{}], trade_stats=True))
+
+    stat = records[0]["stat"]
+    assert stat["总交易次数"] > 0
+    assert 0 <= stat["胜率"] <= 1
+    assert stat["多头交易次数"] > 0 and stat["空头交易次数"] > 0
+    assert "最大空仓周期" in stat
@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+
+import numpy as np
+
+from helpers import SignalStrategy, make_feed
+
+
+def run(precision):
+    feed, benchmark = make_feed()
+    st = SignalStrategy(feed, benchmark, precision=precision)
+    st.start()
+    return st
+
+
+def test_float32_matches_float64_within_tolerance():
+    data64 = run("float64").stat.data
+    data32 = run("float32").stat.data
+
+    np.testing.assert_array_equal(data32.Position.values, data64.Position.values)
+    np.testing.assert_allclose(data32.CumRet.values, data64.CumRet.values, rtol=1e-6)
+    np.testing.assert_allclose(data32.MarketValue.values, data64.MarketValue.values, rtol=1e-6)
+
+
+def test_float32_dtypes():
+    st = run("float32")
+    data = st.stat.data
+
+    assert st.feed["close"].dtype == np.float32
+    assert st.feed["signal"].dtype == np.int8
+    assert st.ctx.broker.ret.dtype == np.float32
+    assert st.ctx.broker.total_position.dtype == np.int32
+    assert st.ctx.broker.open_date.dtype == np.int32
+    assert data.Position.dtype == np.int32
+    assert data.MarketValue.dtype == np.float32
+    assert data.BasisRet.dtype == np.float32
+    assert data.CumRet.dtype == np.float32
@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from backtest.relative import relative_stats, rolling_beta
+from helpers import SignalStrategy, make_feed
+
+
+def test_buy_and_hold_tracks_benchmark():
+    n = 500
+    feed, benchmark = make_feed(n=n, signal=np.ones(n, dtype=int))
+    st = SignalStrategy(feed, benchmark)
+    st.start()
+
+    data = st.stat.data
+    assert data.CumRet.iloc[0] == pytest.approx(benchmark.iloc[0], rel=1e-2)
+    sheet = st.stat.relative_stat_sheet
+    assert sheet["Beta"] == pytest.approx(1., abs=0.05)
+    assert sheet["UpCapture"] == pytest.approx(1., abs=0.05)
+    assert sheet["DownCapture"] == pytest.approx(1., abs=0.05)
+
+
+def test_leading_nans_only_affect_their_column():
+    _, benchmark = make_feed()
+    navs = pd.DataFrame({"full": benchmark * 2., "late": benchmark * 2.})
+    navs.iloc[:10, 1] = np.nan
+
+    stats = relative_stats(benchmark, navs)
+    assert stats.loc["late", "Beta"] == pytest.approx(1.)
+    assert stats.loc["full", "Beta"] == pytest.approx(1.)
+
+    beta = rolling_beta(benchmark, navs, window=20)
+    assert beta["full"].notna().all()
+    assert beta["late"].iloc[:10].isna().all()
+    np.testing.assert_allclose(beta["late"].iloc[10:], 1.)
+
+
+def test_zero_tracking_error_gives_nan_information_ratio():
+    _, benchmark = make_feed()
+    stats = relative_stats(benchmark, benchmark.to_frame("same"))
+    assert stats.loc["same", "TrackingError(%)"] == 0.
+    assert np.isnan(stats.loc["same", "InformationRatio"])
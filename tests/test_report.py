@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from backtest.report import Report, render_reports
+from helpers import SignalStrategy, block_signal, make_feed
+
+
+def run(values):
+    feed, benchmark = make_feed(n=400, signal=block_signal(400, values, 10))
+    st = SignalStrategy(feed, benchmark)
+    st.start()
+    return st
+
+
+def test_from_strategy_keeps_order_list():
+    # 信号以0结尾，所有交易均已平仓
+    st = run([1, 0, -1, 0])
+    order_list = Report.from_strategy(st).order_list
+
+    assert order_list is not None and len(order_list) > 0
+    np.testing.assert_allclose(order_list.holding_ret,
+                               (order_list.close_price - order_list.open_price) * order_list.position)
+
+
+def test_from_strategy_drops_order_list_with_open_position():
+    st = run([0, -1, 0, 1])
+    assert Report.from_strategy(st).order_list is None
+
+
+def test_render_reports_rejects_duplicate_names(tmp_path):
+    prices = pd.Series(np.linspace(100., 110., 30), index=pd.date_range("2020-01-01", periods=30))
+    reports = [Report(prices, name="a"), Report(prices, name="b"), Report(prices, name="a")]
+    with pytest.raises(ValueError, match="duplicate"):
+        render_reports(reports, str(tmp_path), processes=1)
+
+
+@pytest.mark.parametrize("name", ["", "..", "a/b", "a\\b"])
+def test_render_reports_rejects_unsafe_names(tmp_path, name):
+    prices = pd.Series(np.linspace(100., 110., 30), index=pd.date_range("2020-01-01", periods=30))
+    with pytest.raises(ValueError, match="plain file name"):
+        render_reports([Report(prices, name=name)], str(tmp_path), processes=1)
@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from helpers import SignalStrategy, block_signal, make_feed
+
+
+def run_both(feed, benchmark, **kwargs):
+    ticks = SignalStrategy(feed, benchmark, **kwargs)
+    ticks.start()
+    sparse = SignalStrategy(feed, benchmark, **kwargs)
+    sparse.start(sparse=True)
+    return ticks, sparse
+
+
+@pytest.mark.parametrize("precision", ["float64", "float32"])
+def test_sparse_matches_per_tick(precision):
+    feed, benchmark = make_feed()
+    ticks, sparse = run_both(feed, benchmark, precision=precision)
+
+    pd.testing.assert_frame_equal(sparse.stat.data, ticks.stat.data)
+
+
+def test_sparse_only_wakes_on_events():
+    # 每40个bar切换一次信号，包含1与-1之间的直接翻转
+    feed, benchmark = make_feed(signal=block_signal(500, [1, 0, -1, 1, -1, 0], 40))
+    ticks, sparse = run_both(feed, benchmark)
+
+    pd.testing.assert_frame_equal(sparse.stat.data, ticks.stat.data)
+    assert ticks.calls == len(feed)
+    assert sparse.calls < len(feed) / 4
+
+
+def test_sparse_stops_at_position_scale_up():
+    # 持续下跌的空头行情中累计收益不断触发增仓
+    n = 300
+    feed, benchmark = make_feed(n=n, seed=1, drift=-0.02, signal=np.full(n, -1))
+    ticks, sparse = run_both(feed, benchmark)
+
+    data = ticks.stat.data
+    assert data.Position.abs().max() > 10
+    pd.testing.assert_frame_equal(sparse.stat.data, data)
+
+
+def test_sparse_calendar_events_and_flat_position_with_signal():
+    # flat_dates上强制平仓，之后信号不变但头寸为0，需要逐bar唤醒on_tick重新开仓
+    feed, benchmark = make_feed(signal=block_signal(500, [1, -1], 100))
+    flat_dates = list(feed.index[[30, 130, 250]])
+    ticks, sparse = run_both(feed, benchmark, flat_dates=flat_dates)
+
+    data = ticks.stat.data
+    assert (data.loc[flat_dates, "Position"] == 0).all()
+    pd.testing.assert_frame_equal(sparse.stat.data, data)
+    assert sparse.calls < ticks.calls